@@ -0,0 +1,283 @@
+"""
+Reproducible, non-interactive benchmark for the two anagram engines:
+
+- "trie":   Anagram / Trie in 1_RichardAnagram
+- "finder": AnagramFinder in updatedAnagram
+
+A fixed corpus of phrases (1-3 words, 3-14 letters) is run against each
+dictionary. Every (engine, dictionary, phrase) case runs in a fresh
+interpreter with a timeout and records dictionary load time, search time,
+peak memory (max RSS of that process) and the result count. Results are
+normalized to sorted word tuples so the two engines' result sets can be
+compared, and the "wheaton college" case on english.txt is also checked
+against the saved output in sample_wheatoncollege.txt.
+
+sample_wheatoncollege.txt is an output listing rather than a word list, so
+its distinct words are used as a third, small dictionary.
+
+Output is CSV (or JSON). With --baseline, each case is compared to an
+earlier CSV: slowdowns beyond --tolerance, new timeouts/errors and changed
+result counts or match flags are flagged as regressions. Disagreements that
+were already in the baseline (AnagramFinder never returns multi-word
+anagrams) are not regressions.
+
+Exit codes:
+    0  no regression (with --baseline) / all result sets agree (without)
+    1  a case regressed against the baseline
+    2  without --baseline: the engines disagree or the reference differs
+
+Usage:
+    python anagramBenchmark.py --output anagram_benchmark.csv
+    python anagramBenchmark.py --baseline anagram_benchmark.csv --tolerance 1.5
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RICHARD_DIR = os.path.join(HERE, "1_RichardAnagram")
+UPDATED_DIR = os.path.join(HERE, "updatedAnagram")
+
+PHRASES = [
+    "cat",
+    "a cat",
+    "listen",
+    "the eyes",
+    "dormitory",
+    "astronomer",
+    "a gentleman",
+    "wheaton college",
+]
+DICTIONARIES = ["test.txt", "english.txt", "sample_wheatoncollege.txt"]
+ENGINES = ["trie", "finder"]
+
+# The saved listing is the trie engine's output for this case
+REFERENCE_CASE = ("english.txt", "wheaton college")
+REFERENCE_FILE = os.path.join(RICHARD_DIR, "sample_wheatoncollege.txt")
+
+# Timings below this are mostly process noise and are never flagged as regressions
+NOISE_FLOOR_SECONDS = 0.01
+
+EXIT_REGRESSED = 1
+EXIT_MISMATCH = 2
+
+RESULT_LINE = re.compile(r"^\s*\d+:\s*(.*)$")
+
+FIELDS = ["engine", "dictionary", "phrase", "letters", "words", "status",
+          "load_seconds", "search_seconds", "peak_rss_kb", "result_count",
+          "results_match", "diff_count", "reference_match", "regression"]
+
+Anagram = Tuple[str, ...]
+
+
+def normalize(anagram: str) -> Anagram:
+    """An anagram as a sorted tuple of words, so word order does not matter."""
+    return tuple(sorted(anagram.split()))
+
+
+def read_listing(path: str) -> Set[Anagram]:
+    """Parses `   1: ace eel low thong` style output into normalized anagrams."""
+    with open(path, "r", encoding="utf-8") as file:
+        return {normalize(match.group(1)) for line in file if (match := RESULT_LINE.match(line))}
+
+
+def listing_to_dictionary(path: str, directory: str) -> str:
+    """Writes the distinct words of an output listing as a one-word-per-line dictionary."""
+    words = sorted({word for anagram in read_listing(path) for word in anagram})
+    target = os.path.join(directory, os.path.basename(path))
+    with open(target, "w", encoding="utf-8") as file:
+        file.write("\n".join(words) + "\n")
+    return target
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+def _run_trie(phrase: str, dictionary: str) -> Tuple[float, float, Set[Anagram]]:
+    sys.path.insert(0, RICHARD_DIR)
+    from Anagram import Anagram as TrieAnagram
+
+    start = time.perf_counter()
+    engine = TrieAnagram(phrase, dictionary)
+    loaded = time.perf_counter()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):  # The engine prints every anagram
+        engine.findAnagrams()
+    searched = time.perf_counter()
+    results = {normalize(match.group(1)) for line in output.getvalue().splitlines()
+               if (match := RESULT_LINE.match(line))}
+    return loaded - start, searched - loaded, results
+
+
+def _run_finder(phrase: str, dictionary: str) -> Tuple[float, float, Set[Anagram]]:
+    sys.path.insert(0, UPDATED_DIR)
+    from updated_anagram_finder import AnagramFinder
+
+    start = time.perf_counter()
+    engine = AnagramFinder(phrase, dictionary)
+    loaded = time.perf_counter()
+    results = {normalize(anagram) for anagram in engine.find_anagrams()}
+    searched = time.perf_counter()
+    return loaded - start, searched - loaded, results
+
+
+def _case_worker(engine: str, phrase: str, dictionary: str, queue) -> None:
+    """Runs one case in a fresh interpreter and reports back through `queue`."""
+    try:
+        runner = _run_trie if engine == "trie" else _run_finder
+        load_seconds, search_seconds, results = runner(phrase, dictionary)
+        queue.put({"status": "ok", "load_seconds": load_seconds, "search_seconds": search_seconds,
+                   "peak_rss_kb": _peak_rss_kb(), "results": sorted(results)})
+    except Exception as error:  # Reported as a row, not a crash of the whole suite
+        queue.put({"status": f"error: {type(error).__name__}: {error}"})
+
+
+def run_case(engine: str, phrase: str, dictionary: str, timeout: float) -> Dict:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_case_worker, args=(engine, phrase, dictionary, queue))
+    process.start()
+    try:
+        outcome = queue.get(timeout=timeout)
+    except Exception:
+        outcome = {"status": "timeout"}
+    process.join(1)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    return outcome
+
+
+def run_suite(phrases: List[str], dictionaries: List[str], engines: List[str],
+              timeout: float, repeat: int) -> List[Dict]:
+    """Runs every case `repeat` times (best time kept) and compares result sets."""
+    rows: List[Dict] = []
+    reference = read_listing(REFERENCE_FILE)
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in dictionaries:
+            path = os.path.join(RICHARD_DIR, name)
+            if name == os.path.basename(REFERENCE_FILE):
+                path = listing_to_dictionary(path, workdir)
+            for phrase in phrases:
+                results: Dict[str, Optional[Set[Anagram]]] = {}
+                case_rows = []
+                for engine in engines:
+                    best: Optional[Dict] = None
+                    for _ in range(repeat):
+                        outcome = run_case(engine, phrase, path, timeout)
+                        if outcome["status"] != "ok":
+                            best = outcome
+                            break
+                        if best is None or outcome["search_seconds"] < best["search_seconds"]:
+                            best = outcome
+                    found = set(map(tuple, best["results"])) if best["status"] == "ok" else None
+                    results[engine] = found
+                    row = {
+                        "engine": engine, "dictionary": name, "phrase": phrase,
+                        "letters": sum(ch.isalpha() for ch in phrase), "words": len(phrase.split()),
+                        "status": best["status"],
+                        "load_seconds": best.get("load_seconds"),
+                        "search_seconds": best.get("search_seconds"),
+                        "peak_rss_kb": best.get("peak_rss_kb"),
+                        "result_count": len(found) if found is not None else None,
+                        "reference_match": (found == reference if found is not None else None)
+                        if (name, phrase) == REFERENCE_CASE else None,
+                    }
+                    case_rows.append(row)
+
+                completed = [found for found in results.values() if found is not None]
+                for row in case_rows:
+                    if len(completed) == len(engines) and len(engines) > 1:
+                        row["results_match"] = all(found == completed[0] for found in completed)
+                        row["diff_count"] = len(set.union(*completed) - set.intersection(*completed))
+                    else:
+                        row["results_match"] = row["diff_count"] = None
+                    rows.append(row)
+                    print(f"{row['engine']:>6} | {name:<26} | {phrase:<16} | {row['status']:<7} | "
+                          f"{row['result_count']} results", file=sys.stderr)
+    return rows
+
+
+def flag_regressions(rows: List[Dict], baseline_path: str, tolerance: float) -> None:
+    """
+    Marks rows that are more than `tolerance` times slower than the baseline
+    CSV, or whose status, result count or match flags changed from it.
+    """
+    with open(baseline_path, "r", newline="") as file:
+        baseline = {(r["engine"], r["dictionary"], r["phrase"]): r for r in csv.DictReader(file)}
+    for row in rows:
+        before = baseline.get((row["engine"], row["dictionary"], row["phrase"]))
+        if before is None or row["status"] != "ok" and before["status"] != "ok":
+            continue
+        if row["status"] != "ok":
+            row["regression"] = f"now {row['status']}"
+            continue
+        slower = []
+        for field in ("load_seconds", "search_seconds"):
+            if before.get(field) and float(before[field]) > NOISE_FLOOR_SECONDS \
+                    and row[field] > tolerance * float(before[field]):
+                slower.append(f"{field} x{row[field] / float(before[field]):.2f}")
+        if before["status"] == "ok":
+            # CSV round-trips None as "" and booleans as "True"/"False"
+            for field in ("result_count", "results_match", "reference_match"):
+                now = "" if row[field] is None else str(row[field])
+                if now != before[field]:
+                    slower.append(f"{field} {before[field] or None} -> {now or None}")
+        row["regression"] = "; ".join(slower) or None
+
+
+def write_rows(rows: List[Dict], output: Optional[str], fmt: str) -> None:
+    stream = open(output, "w", newline="") if output else sys.stdout
+    try:
+        if fmt == "json":
+            json.dump([{field: row.get(field) for field in FIELDS} for row in rows], stream, indent=1)
+            stream.write("\n")
+        else:
+            writer = csv.DictWriter(stream, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({field: row.get(field) for field in FIELDS})
+    finally:
+        if output:
+            stream.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the anagram engines.")
+    parser.add_argument("--phrases", nargs="+", default=PHRASES)
+    parser.add_argument("--dictionaries", nargs="+", default=DICTIONARIES, choices=DICTIONARIES)
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per case")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; best time is kept")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--baseline", help="earlier CSV output to compare timings against")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+
+    rows = run_suite(args.phrases, args.dictionaries, args.engines, args.timeout, args.repeat)
+    if args.baseline:
+        flag_regressions(rows, args.baseline, args.tolerance)
+    write_rows(rows, args.output, args.format)
+
+    if args.baseline:
+        sys.exit(EXIT_REGRESSED if any(row.get("regression") for row in rows) else 0)
+    mismatched = any(row["results_match"] is False or row["reference_match"] is False for row in rows)
+    sys.exit(EXIT_MISMATCH if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,6 @@ Features:
 
 import collections
 from typing import Set, Dict
-import nltk
-from nltk.corpus import words
-
-# Ensure the words list is available in NLTK
-nltk.download('words')
 
 
 class AnagramFinder:
@@ -38,10 +33,14 @@ class AnagramFinder:
         """
         if dictionary_file:
             try:
-                with open("dictionary.txt", "r", encoding="utf-8") as file:
+                with open(dictionary_file, "r", encoding="utf-8") as file:
                     return {line.strip().lower() for line in file}
             except FileNotFoundError:
                 print("Error: Dictionary file not found. Using NLTK word list instead.")
+        # Only pull in NLTK (and its corpus download) when it is actually needed
+        import nltk
+        from nltk.corpus import words
+        nltk.download('words', quiet=True)
         return set(words.words())
 
     def is_valid_word(self, word: str) -> bool:
@@ -0,0 +1,157 @@
+"""
+Cached feature store for the Federalist authorship experiments.
+
+Every stage of feature preparation is persisted to disk in binary form and
+keyed by what it was built from, so a later experiment only recomputes the
+stages whose inputs changed:
+
+    parsed    key = hash of the source files (+ n-gram settings)
+              -> sparse matrix, feature names, doc names and parsed metadata
+    filtered  key = parsed key + std threshold
+              -> variance-filtered sparse matrix and surviving feature names
+
+Matrices are stored with `scipy.sparse.save_npz`; labels and metadata are
+stored column by column as typed numpy arrays in an uncompressed `.npz`,
+which loads without pickle and without parsing text.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from metadata import coerce_meta
+from ngram_features import build_ngram_matrix, find_documents
+from sparse_pipeline import (STD_THRESHOLD, AuthorshipDataset, filter_low_variance,
+                             from_ngram_matrix, load_lexos_csv)
+
+META_COLUMNS = ['paper_id', 'author', 'paper_type']
+
+
+class FeatureStore:
+    """Directory of cached feature stages (default `.feature_store/`)."""
+
+    def __init__(self, root: str = ".feature_store") -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._fingerprints_path = os.path.join(root, "fingerprints.json")
+        self._fingerprints: Dict[str, list] = self._read_fingerprints()
+
+    # ----- public loaders -----
+
+    def lexos_dataset(self, csv_path: str, threshold: float = STD_THRESHOLD) -> AuthorshipDataset:
+        """Filtered dataset for a Lexos proportion CSV."""
+        source_key = self._key("lexos", self.hash_files([csv_path]))
+        return self._filtered(source_key, threshold, lambda: load_lexos_csv(csv_path))
+
+    def corpus_dataset(self, corpus_dir: str, n: int = 1, threshold: float = STD_THRESHOLD,
+                       **ngram_options) -> AuthorshipDataset:
+        """Filtered dataset for a directory of raw paper texts."""
+        paths = find_documents(corpus_dir)
+        # `workers` changes how features are counted, not what they are
+        options = json.dumps({k: v for k, v in dict(ngram_options, n=n).items() if k != 'workers'},
+                             sort_keys=True)
+        source_key = self._key("corpus", self.hash_files(paths), options)
+        return self._filtered(source_key, threshold,
+                              lambda: from_ngram_matrix(build_ngram_matrix(paths, n=n, **ngram_options)))
+
+    # ----- stages -----
+
+    def _filtered(self, source_key: str, threshold: float,
+                  build: Callable[[], AuthorshipDataset]) -> AuthorshipDataset:
+        filtered_dir = self._stage_dir("filtered", self._key(source_key, repr(float(threshold))))
+        if os.path.isdir(filtered_dir):
+            return self._read(filtered_dir)
+        parsed = self._parsed(source_key, build)
+        filtered = filter_low_variance(parsed, threshold)
+        self._write(filtered_dir, filtered)
+        return filtered
+
+    def _parsed(self, source_key: str, build: Callable[[], AuthorshipDataset]) -> AuthorshipDataset:
+        parsed_dir = self._stage_dir("parsed", source_key)
+        if os.path.isdir(parsed_dir):
+            return self._read(parsed_dir)
+        parsed = build()
+        self._write(parsed_dir, parsed)
+        return parsed
+
+    # ----- hashing -----
+
+    def hash_files(self, paths: Sequence[str]) -> str:
+        """
+        Content hash of the given files. Per-file hashes are remembered by
+        (size, mtime) so unchanged sources are not re-read on every load.
+        """
+        digest = hashlib.sha256()
+        for path in sorted(paths):
+            digest.update(os.path.basename(path).encode("utf-8"))
+            digest.update(self._file_hash(path).encode("ascii"))
+        self._write_fingerprints()
+        return digest.hexdigest()
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        absolute = os.path.abspath(path)
+        cached = self._fingerprints.get(absolute)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        self._fingerprints[absolute] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(*parts: str) -> str:
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:24]
+
+    def _read_fingerprints(self) -> Dict[str, list]:
+        try:
+            with open(self._fingerprints_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_fingerprints(self) -> None:
+        with open(self._fingerprints_path, "w", encoding="utf-8") as file:
+            json.dump(self._fingerprints, file)
+
+    # ----- storage -----
+
+    def _stage_dir(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, f"{stage}-{key}")
+
+    def _write(self, stage_dir: str, data: AuthorshipDataset) -> None:
+        """Writes into a temporary directory first so a crash never leaves half a stage."""
+        tmp_dir = tempfile.mkdtemp(dir=self.root)
+        try:
+            sparse.save_npz(os.path.join(tmp_dir, "matrix.npz"), sparse.csr_matrix(data.X), compressed=False)
+            columns = {
+                'doc_name': np.array(data.doc_names, dtype=str),
+                'feature': np.array(data.features, dtype=str),
+                'paper_id': data.meta['paper_id'].to_numpy(dtype=np.int64),
+                'author': data.meta['author'].to_numpy(dtype=str),
+                'paper_type': data.meta['paper_type'].to_numpy(dtype=str),
+            }
+            np.savez(os.path.join(tmp_dir, "columns.npz"), **columns)
+            os.replace(tmp_dir, stage_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(stage_dir):
+                raise
+
+    @staticmethod
+    def _read(stage_dir: str) -> AuthorshipDataset:
+        X = sparse.load_npz(os.path.join(stage_dir, "matrix.npz")).tocsr()
+        with np.load(os.path.join(stage_dir, "columns.npz"), allow_pickle=False) as columns:
+            doc_names: List[str] = columns['doc_name'].tolist()
+            features: List[str] = columns['feature'].tolist()
+            meta = coerce_meta(pd.DataFrame({name: columns[name] for name in META_COLUMNS}, index=doc_names))
+        return AuthorshipDataset(X, doc_names, features, meta)
@@ -0,0 +1,78 @@
+"""
+Shared metadata parsing for Federalist document labels.
+
+Document labels look like `FED_<paper id>_<author code>` (e.g. `FED_49_D`).
+Instead of applying a Python function to every row, the whole index is split
+at once with pandas' vectorized string methods, and the author code is
+mapped per category rather than per row. `author` and `paper_type` use fixed
+categorical dtypes, and every parsed frame is checked against `SCHEMA`.
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+AUTHOR_MAP = {'H': 'Hamilton', 'M': 'Madison', 'J': 'Jay',
+              'D': 'Disputed', 'C': 'Co-authored'}
+PAPER_TYPE_MAP = {'H': 'Known', 'M': 'Known', 'J': 'Known',
+                  'D': 'Disputed', 'C': 'Co-authored'}
+
+AUTHOR_DTYPE = pd.CategoricalDtype(list(AUTHOR_MAP.values()))
+PAPER_TYPE_DTYPE = pd.CategoricalDtype(['Known', 'Disputed', 'Co-authored'])
+
+SCHEMA = {
+    'paper_id': np.dtype('int64'),
+    'author': AUTHOR_DTYPE,
+    'paper_type': PAPER_TYPE_DTYPE,
+}
+
+
+def parse_doc_names(names: Iterable[str]) -> pd.DataFrame:
+    """
+    Parses document labels into a frame with paper_id, author and paper_type,
+    indexed by the labels themselves. Raises ValueError on malformed labels.
+    """
+    index = pd.Index(names, dtype=object)
+    parts = pd.Series(index, index=index, dtype=object).str.split('_', expand=True)
+    if parts.shape[1] < 3:
+        raise ValueError("Document labels must look like 'FED_<id>_<author code>'.")
+
+    paper_id = pd.to_numeric(parts[1], errors='coerce')
+    codes = parts[2].astype('category')
+    bad = paper_id.isna() | ~parts[2].isin(list(AUTHOR_MAP))
+    if bad.any():
+        raise ValueError(f"Malformed document labels: {list(index[bad.to_numpy()][:5])}")
+
+    meta = pd.DataFrame({
+        'paper_id': paper_id.astype(SCHEMA['paper_id']),
+        'author': _recode(codes, AUTHOR_MAP, AUTHOR_DTYPE),
+        'paper_type': _recode(codes, PAPER_TYPE_MAP, PAPER_TYPE_DTYPE),
+    }, index=index)
+    return validate_meta(meta)
+
+
+def _recode(codes: pd.Series, mapping: dict, dtype: pd.CategoricalDtype) -> pd.Series:
+    """Maps a categorical of author codes onto `dtype` by translating category codes only."""
+    targets = dtype.categories.get_indexer([mapping[code] for code in codes.cat.categories])
+    values = pd.Categorical.from_codes(targets[codes.cat.codes.to_numpy()], dtype=dtype)
+    return pd.Series(values, index=codes.index)
+
+
+def coerce_meta(meta: pd.DataFrame) -> pd.DataFrame:
+    """Casts stored metadata (e.g. plain string columns) to the schema dtypes."""
+    return validate_meta(meta.astype(SCHEMA))
+
+
+def validate_meta(meta: pd.DataFrame) -> pd.DataFrame:
+    """Checks columns, dtypes and values against `SCHEMA`; returns `meta` unchanged."""
+    if list(meta.columns) != list(SCHEMA):
+        raise ValueError(f"Expected metadata columns {list(SCHEMA)}, got {list(meta.columns)}.")
+    for column, dtype in SCHEMA.items():
+        if meta[column].dtype != dtype:
+            raise ValueError(f"Column '{column}' has dtype {meta[column].dtype}, expected {dtype}.")
+        if meta[column].isna().any():
+            raise ValueError(f"Column '{column}' contains missing or unexpected values.")
+    if (meta['paper_id'] <= 0).any():
+        raise ValueError("paper_id must be a positive integer.")
+    return meta
@@ -0,0 +1,162 @@
+"""
+Native n-gram feature extraction for the Federalist Papers.
+
+Builds the same kind of document-by-token matrices that were previously
+exported from Lexos (`lexos_1gram_inALL_prop.csv`, `lexos_2gram_prop.csv`),
+but straight from the raw paper texts and in scipy CSR format:
+
+- Files are tokenized line by line, so a paper is never held in memory whole.
+- Files are counted in parallel across a process pool.
+- Features are either a pruned vocabulary (`min_df` / `max_features`) or
+  hashed into a fixed number of buckets (`n_features`).
+
+Document labels are the file names without extension (e.g. `FED_10_H.txt`
+becomes `FED_10_H`), which matches the row labels used by Lexos.
+"""
+
+import os
+import re
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Lowercase words, keeping inner apostrophes ("don't", "nation's")
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+
+@dataclass
+class NgramMatrix:
+    """Sparse document-by-feature count matrix with its row and column labels."""
+
+    counts: sparse.csr_matrix
+    doc_names: List[str]
+    features: List[str]
+
+    def proportions(self) -> sparse.csr_matrix:
+        """Row-normalizes the counts into relative frequencies (Lexos 'prop')."""
+        totals = np.asarray(self.counts.sum(axis=1)).ravel().astype(np.float64)
+        totals[totals == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / totals) @ self.counts)
+
+    def to_frame(self, proportional: bool = True) -> pd.DataFrame:
+        """Returns a sparse-backed DataFrame laid out like the Lexos CSV exports."""
+        values = self.proportions() if proportional else self.counts
+        return pd.DataFrame.sparse.from_spmatrix(values, index=self.doc_names, columns=self.features)
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[str]:
+    """Yields lowercase word tokens from an iterable of text lines."""
+    for line in lines:
+        yield from TOKEN_PATTERN.findall(line.lower())
+
+
+def iter_ngrams(tokens: Iterable[str], n: int) -> Iterator[str]:
+    """Yields space-joined n-grams over a token stream (n-grams may span lines)."""
+    window: deque = deque(maxlen=n)
+    for token in tokens:
+        window.append(token)
+        if len(window) == n:
+            yield " ".join(window)
+
+
+def count_file(path: str, n: int = 1) -> Counter:
+    """Streams one text file and counts its n-grams."""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return Counter(iter_ngrams(tokenize(file), n))
+
+
+def hash_feature(ngram: str, n_features: int) -> int:
+    """Maps an n-gram to a bucket; crc32 is stable across processes, unlike hash()."""
+    return zlib.crc32(ngram.encode("utf-8")) % n_features
+
+
+def _count_file_hashed(path: str, n: int, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts one file directly into hashed buckets, returning (indices, counts)."""
+    buckets: Counter = Counter()
+    for ngram, count in count_file(path, n).items():
+        buckets[hash_feature(ngram, n_features)] += count
+    indices = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+    counts = np.fromiter(buckets.values(), dtype=np.int64, count=len(buckets))
+    order = np.argsort(indices)
+    return indices[order], counts[order]
+
+
+def _count_file_worker(args: Tuple[str, int, Optional[int]]):
+    path, n, n_features = args
+    if n_features:
+        return _count_file_hashed(path, n, n_features)
+    return count_file(path, n)
+
+
+def _stack_rows(rows: Sequence[Tuple[np.ndarray, np.ndarray]], n_cols: int) -> sparse.csr_matrix:
+    """Assembles per-document (indices, counts) pairs into a CSR matrix."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+    indices = np.concatenate([r[0] for r in rows]) if rows else np.empty(0, dtype=np.int64)
+    data = np.concatenate([r[1] for r in rows]) if rows else np.empty(0, dtype=np.int64)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), n_cols))
+
+
+def build_vocabulary(counters: Sequence[Counter], min_df: int = 1,
+                     max_features: Optional[int] = None) -> List[str]:
+    """
+    Keeps n-grams that appear in at least `min_df` documents, then the
+    `max_features` most frequent of those (ties broken alphabetically).
+    """
+    doc_freq: Counter = Counter()
+    total: Counter = Counter()
+    for counter in counters:
+        doc_freq.update(counter.keys())
+        total.update(counter)
+
+    kept = [ngram for ngram, df in doc_freq.items() if df >= min_df]
+    if max_features is not None and len(kept) > max_features:
+        kept.sort(key=lambda ngram: (-total[ngram], ngram))
+        kept = kept[:max_features]
+    return sorted(kept)
+
+
+def find_documents(corpus_dir: str, extension: str = ".txt") -> List[str]:
+    """Lists the paper files in a corpus directory, sorted by name."""
+    return sorted(os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir)
+                  if name.endswith(extension))
+
+
+def build_ngram_matrix(paths: Sequence[str], n: int = 1, min_df: int = 1,
+                       max_features: Optional[int] = None, n_features: Optional[int] = None,
+                       workers: Optional[int] = None) -> NgramMatrix:
+    """
+    Counts n-grams for every file in `paths` and returns a sparse count matrix.
+
+    With `n_features` set, n-grams are hashed into that many buckets and the
+    vocabulary is never materialized (feature names are `hash_<bucket>`).
+    Otherwise the vocabulary is pruned with `min_df` and `max_features`.
+    `workers=1` counts in-process, which is handy for debugging.
+    """
+    doc_names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    jobs = [(path, n, n_features) for path in paths]
+
+    if workers == 1:
+        results = [_count_file_worker(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_count_file_worker, jobs))
+
+    if n_features:
+        features = [f"hash_{bucket}" for bucket in range(n_features)]
+        return NgramMatrix(_stack_rows(results, n_features), doc_names, features)
+
+    features = build_vocabulary(results, min_df=min_df, max_features=max_features)
+    column: Dict[str, int] = {ngram: i for i, ngram in enumerate(features)}
+    rows = []
+    for counter in results:
+        pairs = sorted((column[ngram], count) for ngram, count in counter.items() if ngram in column)
+        rows.append((np.array([p[0] for p in pairs], dtype=np.int64),
+                     np.array([p[1] for p in pairs], dtype=np.int64)))
+    return NgramMatrix(_stack_rows(rows, len(features)), doc_names, features)
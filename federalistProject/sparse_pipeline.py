@@ -0,0 +1,209 @@
+"""
+Sparse authorship pipeline for the Federalist Papers.
+
+Packages the notebook workflow (variance filtering, projection, clustering and
+classification) so that features stay in scipy CSR format end to end:
+
+- Token standard deviations are computed from the non-zeros only.
+- PCA is replaced by TruncatedSVD, which works on sparse input without
+  centering (and therefore without densifying) the matrix.
+- LogisticRegression, RandomForestClassifier and MultinomialNB are all
+  trained directly on the sparse matrix.
+
+Memory use and fit time therefore scale with the number of non-zeros rather
+than with the vocabulary size, which matters for 2-grams and 3-grams.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.cluster import KMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeClassifier
+
+from metadata import parse_doc_names
+from ngram_features import NgramMatrix
+
+STD_THRESHOLD = 0.00005  # Same cut-off as the notebook's histogram
+
+
+@dataclass
+class AuthorshipDataset:
+    """Sparse feature matrix plus the labels needed to model it."""
+
+    X: sparse.csr_matrix
+    doc_names: List[str]
+    features: List[str]
+    meta: pd.DataFrame  # paper_id, author, paper_type; indexed by doc name
+
+    def subset(self, mask: np.ndarray) -> 'AuthorshipDataset':
+        """Returns the rows selected by a boolean mask."""
+        names = [name for name, keep in zip(self.doc_names, mask) if keep]
+        return AuthorshipDataset(self.X[mask], names, self.features, self.meta[mask])
+
+    def known(self) -> 'AuthorshipDataset':
+        return self.subset((self.meta['paper_type'] == 'Known').to_numpy())
+
+    def unknown(self) -> 'AuthorshipDataset':
+        return self.subset((self.meta['paper_type'] != 'Known').to_numpy())
+
+
+def _drop_summary_rows(names: List[str]) -> np.ndarray:
+    """Mask that drops the Total/Average rows Lexos appends to its exports."""
+    return ~pd.Index(names).str.contains("Total|Average", case=False)
+
+
+def from_ngram_matrix(matrix: NgramMatrix, proportional: bool = True) -> AuthorshipDataset:
+    """Wraps the output of `ngram_features.build_ngram_matrix`."""
+    X = matrix.proportions() if proportional else matrix.counts.astype(np.float64)
+    return AuthorshipDataset(sparse.csr_matrix(X), list(matrix.doc_names),
+                             list(matrix.features), parse_doc_names(matrix.doc_names))
+
+
+def load_lexos_csv(path: str, chunksize: int = 16) -> AuthorshipDataset:
+    """
+    Loads a Lexos proportion CSV a few rows at a time, converting each chunk
+    to CSR so the full dense matrix never exists in memory.
+    """
+    blocks, names = [], []
+    features: Optional[List[str]] = None
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunksize):
+        keep = _drop_summary_rows(list(chunk.index))
+        chunk = chunk[keep]
+        features = list(chunk.columns)
+        names.extend(str(name) for name in chunk.index)
+        blocks.append(sparse.csr_matrix(chunk.to_numpy(dtype=np.float64)))
+    X = sparse.vstack(blocks, format='csr') if blocks else sparse.csr_matrix((0, 0))
+    return AuthorshipDataset(X, names, features or [], parse_doc_names(names))
+
+
+def sparse_std(X: sparse.spmatrix, ddof: int = 1) -> np.ndarray:
+    """Column standard deviations from the non-zeros (matches `DataFrame.std()`)."""
+    n = X.shape[0]
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    mean_sq = np.asarray(X.multiply(X).mean(axis=0)).ravel()
+    var = (mean_sq - mean ** 2) * n / max(n - ddof, 1)
+    return np.sqrt(np.clip(var, 0.0, None))
+
+
+def filter_low_variance(data: AuthorshipDataset, threshold: float = STD_THRESHOLD) -> AuthorshipDataset:
+    """Drops tokens whose standard deviation is at or below `threshold`."""
+    keep = np.flatnonzero(sparse_std(data.X) > threshold)
+    return AuthorshipDataset(data.X[:, keep], data.doc_names,
+                             [data.features[i] for i in keep], data.meta)
+
+
+def project_and_cluster(X: sparse.spmatrix, n_components: int = 2, n_clusters: int = 3,
+                        random_state: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """TruncatedSVD down to `n_components`, then KMeans on the projection."""
+    coords = TruncatedSVD(n_components=n_components, random_state=random_state).fit_transform(X)
+    clusters = KMeans(n_clusters=n_clusters, random_state=random_state).fit_predict(coords)
+    return coords, clusters
+
+
+def build_models(random_state: int = 42) -> Dict[str, object]:
+    """The notebook's classifiers, all of which accept CSR input."""
+    return {
+        'logistic_regression': LogisticRegression(max_iter=1000, class_weight='balanced'),
+        'random_forest': RandomForestClassifier(n_estimators=100, random_state=random_state),
+        'naive_bayes': MultinomialNB(),
+    }
+
+
+def split_known(data: AuthorshipDataset, test_size: float = 0.4,
+                random_state: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Stratified train/validation row positions within the known papers."""
+    known = data.known()
+    positions = np.arange(known.X.shape[0])
+    return train_test_split(positions, test_size=test_size, random_state=random_state,
+                            stratify=known.meta['author'].to_numpy())
+
+
+def fit_models(data: AuthorshipDataset, train_idx: np.ndarray,
+               random_state: int = 42) -> Dict[str, object]:
+    """Fits every model on the given known-paper rows."""
+    known = data.known()
+    y = known.meta['author'].to_numpy()
+    models = build_models(random_state)
+    for model in models.values():
+        model.fit(known.X[train_idx], y[train_idx])
+    return models
+
+
+def predict_unknown(data: AuthorshipDataset, models: Dict[str, object]) -> pd.DataFrame:
+    """Predicts an author for every Disputed and Co-authored paper."""
+    unknown = data.unknown()
+    result = unknown.meta[['paper_id', 'paper_type']].copy()
+    for name, model in models.items():
+        result[name] = model.predict(unknown.X)
+    return result
+
+
+class PredictionStacker:
+    """
+    Decision tree that combines 1-gram and 2-gram predictions, as in the
+    notebook's final cell. Both prediction columns share one label encoder.
+    """
+
+    def __init__(self, max_depth: int = 3, random_state: int = 42):
+        self.encoder = LabelEncoder()
+        self.tree = DecisionTreeClassifier(max_depth=max_depth, random_state=random_state)
+
+    def fit(self, pred_1gram: np.ndarray, pred_2gram: np.ndarray, y: np.ndarray) -> 'PredictionStacker':
+        self.encoder.fit(np.concatenate([pred_1gram, pred_2gram, y]))
+        self.tree.fit(self._encode(pred_1gram, pred_2gram), self.encoder.transform(y))
+        return self
+
+    def predict(self, pred_1gram: np.ndarray, pred_2gram: np.ndarray) -> np.ndarray:
+        return self.encoder.inverse_transform(self.tree.predict(self._encode(pred_1gram, pred_2gram)))
+
+    def _encode(self, pred_1gram: np.ndarray, pred_2gram: np.ndarray) -> np.ndarray:
+        return np.column_stack([self.encoder.transform(pred_1gram), self.encoder.transform(pred_2gram)])
+
+
+def align(first: AuthorshipDataset, second: AuthorshipDataset) -> Tuple[AuthorshipDataset, AuthorshipDataset]:
+    """Restricts two datasets to their shared papers, in the same row order."""
+    second_names = set(second.doc_names)
+    shared = [name for name in first.doc_names if name in second_names]
+    return _reorder(first, shared), _reorder(second, shared)
+
+
+def _reorder(data: AuthorshipDataset, names: List[str]) -> AuthorshipDataset:
+    position = {name: i for i, name in enumerate(data.doc_names)}
+    rows = np.array([position[name] for name in names], dtype=np.int64)
+    return AuthorshipDataset(data.X[rows], names, data.features, data.meta.iloc[rows])
+
+
+def run_pipeline(data_1gram: AuthorshipDataset, data_2gram: AuthorshipDataset,
+                 threshold: float = STD_THRESHOLD, random_state: int = 42) -> pd.DataFrame:
+    """
+    End-to-end run mirroring the notebook: filter, fit the 1-gram and 2-gram
+    models on one stratified split, stack their logistic-regression
+    predictions with a decision tree, and return predictions for the
+    Disputed and Co-authored papers.
+    """
+    data_1gram, data_2gram = align(filter_low_variance(data_1gram, threshold),
+                                   filter_low_variance(data_2gram, threshold))
+    train_idx, val_idx = split_known(data_1gram, random_state=random_state)
+    models_1gram = fit_models(data_1gram, train_idx, random_state)
+    models_2gram = {'logistic_regression_2gram': fit_models(data_2gram, train_idx, random_state)['logistic_regression']}
+
+    known_1, known_2 = data_1gram.known(), data_2gram.known()
+    stacker = PredictionStacker(random_state=random_state).fit(
+        models_1gram['logistic_regression'].predict(known_1.X[val_idx]),
+        models_2gram['logistic_regression_2gram'].predict(known_2.X[val_idx]),
+        known_1.meta['author'].to_numpy()[val_idx])
+
+    result = predict_unknown(data_1gram, models_1gram)
+    result['logistic_regression_2gram'] = predict_unknown(data_2gram, models_2gram)['logistic_regression_2gram'].to_numpy()
+    result['final_decision'] = stacker.predict(result['logistic_regression'].to_numpy(),
+                                               result['logistic_regression_2gram'].to_numpy())
+    return result
@@ -0,0 +1,555 @@
+"""
+Declarative, chunked data-cleaning pipeline for the diabetes workflow.
+
+WorkFlowDataPrep.ipynb cleans the data by mutating one in-memory DataFrame
+cell by cell. Here the same steps are written down as a list of `Step`
+objects and run in two stages over a CSV that is only ever read in chunks:
+
+1. Stats pass: gathers the means, medians and quantiles each step needs.
+   A step's statistics depend on everything before it (e.g. winsorization
+   caps are computed after the median replacements), so the stats pass makes
+   one scan per dependency level. Steps whose inputs are independent of the
+   still-unfitted steps gather their statistics in the same scan.
+2. Transform pass: every chunk is pushed through the fitted steps and
+   appended to the output, optionally across worker processes.
+
+Memory is bounded by the chunk size plus what the statistics need: one
+hash per distinct row for duplicate detection, and for each median/quantile
+column either every value (`quantile_mode='exact'`, matches pandas) or a
+KLL sketch of O(k log n) values (`quantile_mode='sketch'`, see
+quantile_sketch.py for the error bound). Each step's sketch is seeded from
+`seed` and its position in the step list, so sketch runs are reproducible.
+
+Numeric columns are read as float64. Any other column (patient IDs, coded
+fields) is read as text and passed through unchanged; it is only imputed if
+named in `ImputeMean(mode_columns=...)`, as counting the values of every
+text column would not fit the bounded-memory goal for ID-like columns.
+Which columns are numeric is inferred from the first rows of the file, or
+can be given as `numeric_columns`.
+
+`akimel_oodham_steps()` reproduces cleaned_data.csv byte for byte. That file
+was saved while the notebook still dropped patients older than 62 and added
+a `test_log` column, so both of those steps are part of the recipe.
+
+Usage:
+    python cleaning_pipeline.py Akime-O_odham-diabetes.data.csv cleaned_data.csv --workers 4
+    python cleaning_pipeline.py big_extract.csv big_clean.csv --quantiles sketch --sketch-k 400
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from error_log import ErrorLog, run_id_for
+from quantile_sketch import make_quantiles
+
+ALL_COLUMNS = ('*',)  # Marker for steps that touch every column
+
+FlagSink = Callable[[pd.DataFrame], None]
+
+
+class Step:
+    """
+    One cleaning step.
+
+    reads / writes: columns the step depends on and modifies
+    filters_rows:   whether the step can drop rows
+    needs_fit:      whether the step must see the data before it can apply
+    online:         whether the step fits itself while the data streams past
+    """
+
+    reads: Sequence[str] = ()
+    writes: Sequence[str] = ()
+    filters_rows = False
+    needs_fit = False
+    online = False
+
+    def __init__(self) -> None:
+        self.fitted = not self.needs_fit
+
+    def begin(self, new_quantiles: Callable) -> None:
+        """Called before the scan in which this step collects its statistics."""
+
+    def collect(self, chunk: pd.DataFrame) -> None:
+        """Accumulates statistics from one chunk (stats pass only)."""
+
+    def finish(self) -> None:
+        """Turns the accumulated statistics into fitted parameters."""
+        self.fitted = True
+
+    def apply(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """Returns the transformed chunk and any rows to flag in the error log."""
+        raise NotImplementedError
+
+
+class ImputeMean(Step):
+    """
+    Fills missing numeric values with the column mean, and missing values of
+    the non-numeric `mode_columns` with their most common value, as the
+    notebook does. Other non-numeric columns are left as they are. Rows with
+    any missing value are flagged 'Missing Data'.
+    """
+
+    reads = writes = ALL_COLUMNS
+    needs_fit = True
+
+    def __init__(self, mode_columns: Sequence[str] = ()) -> None:
+        super().__init__()
+        self.mode_columns = list(mode_columns)
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._value_counts: Dict[str, pd.Series] = {}
+        self.means: Dict[str, float] = {}
+        self.modes: Dict[str, str] = {}
+
+    def collect(self, chunk: pd.DataFrame) -> None:
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            self._sums[col] = self._sums.get(col, 0.0) + float(chunk[col].sum())
+            self._counts[col] = self._counts.get(col, 0) + int(chunk[col].count())
+        for col in self.mode_columns:
+            counts = chunk[col].value_counts()
+            previous = self._value_counts.get(col)
+            self._value_counts[col] = counts if previous is None else previous.add(counts, fill_value=0)
+
+    def finish(self) -> None:
+        self.means = {col: self._sums[col] / self._counts[col]
+                      for col in self._sums if self._counts[col]}
+        # Ties go to the smallest value, like `Series.mode()[0]`
+        self.modes = {col: min(counts.index[counts == counts.max()])
+                      for col, counts in self._value_counts.items() if len(counts)}
+        self._value_counts = {}
+        super().finish()
+
+    def apply(self, chunk):
+        missing = chunk.isnull().any(axis=1)
+        flagged = chunk[missing].assign(ERROR_TYPE="Missing Data") if missing.any() else None
+        return chunk.fillna({**self.means, **self.modes}), flagged
+
+
+class DropDuplicates(Step):
+    """
+    Drops repeated rows, keeping the first occurrence. Rows are compared by a
+    64-bit hash while streaming (a sorted array of seen hashes); afterwards
+    only the sorted dropped row positions are kept, so the fitted step can
+    run on any chunk independently. Those positions only mean something for
+    the file the step was fitted on. Rows are compared on all columns unless
+    `columns` is given (e.g. to ignore a patient ID column).
+    """
+
+    reads = ALL_COLUMNS
+    filters_rows = True
+    needs_fit = True
+    online = True
+
+    def __init__(self, columns: Optional[Sequence[str]] = None) -> None:
+        super().__init__()
+        self.columns = list(columns) if columns is not None else None
+        if self.columns is not None:
+            self.reads = tuple(self.columns)
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._dropped_parts: List[np.ndarray] = []
+        self.dropped = np.empty(0, dtype=np.int64)
+
+    def apply(self, chunk):
+        is_dup = self._fitted_duplicates(chunk) if self.fitted else self._new_duplicates(chunk)
+        flagged = chunk[is_dup].assign(ERROR_TYPE="Duplicate Row") if is_dup.any() else None
+        return chunk[~is_dup], flagged
+
+    def _fitted_duplicates(self, chunk: pd.DataFrame) -> np.ndarray:
+        positions = chunk.index.to_numpy(dtype=np.int64)
+        if not len(positions) or not len(self.dropped):
+            return np.zeros(len(positions), dtype=bool)
+        # Only the dropped positions inside this chunk's index range can match
+        lo = np.searchsorted(self.dropped, positions.min(), side="left")
+        hi = np.searchsorted(self.dropped, positions.max(), side="right")
+        return np.isin(positions, self.dropped[lo:hi])
+
+    def _new_duplicates(self, chunk: pd.DataFrame) -> np.ndarray:
+        compared = chunk if self.columns is None else chunk[self.columns]
+        hashes = pd.util.hash_pandas_object(compared, index=False).to_numpy()
+        # Repeats within the chunk, plus rows already seen in earlier chunks
+        is_dup = pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen):
+            slots = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            is_dup |= self._seen[slots] == hashes
+        self._seen = np.union1d(self._seen, hashes[~is_dup])
+        self._dropped_parts.append(chunk.index.to_numpy(dtype=np.int64)[is_dup])
+        return is_dup
+
+    def finish(self) -> None:
+        self.dropped = np.sort(np.concatenate([self.dropped, *self._dropped_parts]))
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._dropped_parts = []
+        super().finish()
+
+
+class ReplaceWithMedian(Step):
+    """Replaces values equal to / above a limit with the column median."""
+
+    needs_fit = True
+
+    def __init__(self, column: str, equals: Optional[float] = None, above: Optional[float] = None) -> None:
+        super().__init__()
+        self.column, self.equals, self.above = column, equals, above
+        self.reads = self.writes = (column,)
+        self._values = None
+        self.median: Optional[float] = None
+
+    def begin(self, new_quantiles):
+        self._values = new_quantiles()
+
+    def collect(self, chunk):
+        self._values.update(chunk[self.column].to_numpy())
+
+    def finish(self):
+        self.median = self._values.quantile(0.5)
+        self._values = None
+        super().finish()
+
+    def apply(self, chunk):
+        values = chunk[self.column]
+        mask = values == self.equals if self.equals is not None else values > self.above
+        chunk = chunk.copy()
+        chunk.loc[mask, self.column] = self.median
+        return chunk, None
+
+
+class ReplaceValue(Step):
+    """Replaces one exact value (e.g. an implausible age) with another."""
+
+    def __init__(self, column: str, old: float, new: float) -> None:
+        super().__init__()
+        self.column, self.old, self.new = column, old, new
+        self.reads = self.writes = (column,)
+
+    def apply(self, chunk):
+        chunk = chunk.copy()
+        chunk.loc[chunk[self.column] == self.old, self.column] = self.new
+        return chunk, None
+
+
+class Log1p(Step):
+    """Applies log(1 + x) to a column, in place or into a new column."""
+
+    def __init__(self, column: str, output: Optional[str] = None) -> None:
+        super().__init__()
+        self.column, self.output = column, output or column
+        self.reads, self.writes = (column,), (self.output,)
+
+    def apply(self, chunk):
+        chunk = chunk.copy()
+        chunk[self.output] = np.log1p(chunk[self.column])
+        return chunk, None
+
+
+class KeepRange(Step):
+    """Drops rows whose value falls outside fixed bounds."""
+
+    filters_rows = True
+
+    def __init__(self, column: str, lower: float = -np.inf, upper: float = np.inf,
+                 error_type: str = "Out of Range") -> None:
+        super().__init__()
+        self.column, self.lower, self.upper, self.error_type = column, lower, upper, error_type
+        self.reads = (column,)
+
+    def apply(self, chunk):
+        keep = chunk[self.column].between(self.lower, self.upper)
+        flagged = chunk[~keep].assign(ERROR_TYPE=self.error_type) if (~keep).any() else None
+        return chunk[keep], flagged
+
+
+class Winsorize(Step):
+    """Caps a column at its lower/upper percentiles."""
+
+    needs_fit = True
+
+    def __init__(self, column: str, lower: float = 0.01, upper: float = 0.99) -> None:
+        super().__init__()
+        self.column, self.lower, self.upper = column, lower, upper
+        self.reads = self.writes = (column,)
+        self._values = None
+        self.limits: Tuple[float, float] = (-np.inf, np.inf)
+
+    def begin(self, new_quantiles):
+        self._values = new_quantiles()
+
+    def collect(self, chunk):
+        self._values.update(chunk[self.column].to_numpy())
+
+    def finish(self):
+        self.limits = (self._values.quantile(self.lower), self._values.quantile(self.upper))
+        self._values = None
+        super().finish()
+
+    def apply(self, chunk):
+        chunk = chunk.copy()
+        chunk[self.column] = np.clip(chunk[self.column], *self.limits)
+        return chunk, None
+
+
+class IQRFilter(Step):
+    """Drops rows outside [Q1 - k*IQR, Q3 + k*IQR] (Tukey's rule)."""
+
+    filters_rows = True
+    needs_fit = True
+
+    def __init__(self, column: str, k: float = 1.5) -> None:
+        super().__init__()
+        self.column, self.k = column, k
+        self.reads = (column,)
+        self._values = None
+        self.bounds: Tuple[float, float] = (-np.inf, np.inf)
+
+    def begin(self, new_quantiles):
+        self._values = new_quantiles()
+
+    def collect(self, chunk):
+        self._values.update(chunk[self.column].to_numpy())
+
+    def finish(self):
+        q1, q3 = self._values.quantile(0.25), self._values.quantile(0.75)
+        self.bounds = (q1 - self.k * (q3 - q1), q3 + self.k * (q3 - q1))
+        self._values = None
+        super().finish()
+
+    def apply(self, chunk):
+        keep = chunk[self.column].between(*self.bounds)
+        flagged = chunk[~keep].assign(ERROR_TYPE=f"IQR Outlier ({self.column})") if (~keep).any() else None
+        return chunk[keep], flagged
+
+
+class Round(Step):
+    """Rounds every column to a fixed number of decimals."""
+
+    reads = writes = ALL_COLUMNS
+
+    def __init__(self, decimals: int = 2) -> None:
+        super().__init__()
+        self.decimals = decimals
+
+    def apply(self, chunk):
+        return chunk.round(self.decimals), None
+
+
+def akimel_oodham_steps() -> List[Step]:
+    """The cleaning recipe that produced cleaned_data.csv, in notebook order."""
+    return [
+        ImputeMean(),
+        DropDuplicates(),
+        ReplaceWithMedian('mass', equals=0),
+        ReplaceWithMedian('age', equals=0),
+        ReplaceWithMedian('mass', above=54.55),
+        Log1p('pedi'),
+        ReplaceValue('age', 130.0, 65.0),
+        KeepRange('age', upper=62.0, error_type="Age Outlier"),
+        KeepRange('class', upper=1.0, error_type="Invalid Class"),
+        *[Winsorize(col) for col in ['plas', 'pres', 'skin', 'test', 'mass', 'pedi']],
+        IQRFilter('test', k=1.5),
+        Log1p('test', output='test_log'),
+        Round(2),
+    ]
+
+
+def _touches(columns: Sequence[str], blocked: Set[str]) -> bool:
+    return bool(blocked) and (columns == ALL_COLUMNS or '*' in blocked or bool(set(columns) & blocked))
+
+
+def _with_line_numbers(flagged: pd.DataFrame) -> pd.DataFrame:
+    # +2 accounts for the zero-based index and the header row, as in the notebook
+    return flagged.assign(Original_Line_Number=flagged.index + 2)
+
+
+def _apply_steps(steps: Sequence[Step], chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[pd.DataFrame]]:
+    flagged_parts = []
+    for step in steps:
+        chunk, flagged = step.apply(chunk)
+        if flagged is not None:
+            flagged_parts.append(_with_line_numbers(flagged))
+    return chunk, flagged_parts
+
+
+# Worker-side copy of the fitted steps, set once per process
+_WORKER_STEPS: List[Step] = []
+
+
+def _init_worker(steps: List[Step]) -> None:
+    _WORKER_STEPS[:] = steps
+
+
+def _transform_chunk(chunk: pd.DataFrame) -> Tuple[List[str], str, List[pd.DataFrame]]:
+    chunk, flagged = _apply_steps(_WORKER_STEPS, chunk)
+    return list(chunk.columns), chunk.to_csv(index=False, header=False), flagged
+
+
+class CleaningPipeline:
+    """Runs a list of `Step`s over a CSV in chunks: stats pass, then transform pass."""
+
+    def __init__(self, steps: Optional[List[Step]] = None, chunksize: int = 100_000,
+                 workers: int = 1, quantile_mode: str = "exact", sketch_k: int = 200,
+                 seed: int = 0, numeric_columns: Optional[Sequence[str]] = None) -> None:
+        self.steps = steps if steps is not None else akimel_oodham_steps()
+        self.chunksize = chunksize
+        self.numeric_columns = list(numeric_columns) if numeric_columns is not None else None
+        self.workers = workers
+        self.seed = seed
+        self.new_quantiles = partial(make_quantiles, quantile_mode, sketch_k)
+        self.new_quantiles()  # Fail early on an unknown mode
+        self.scans = 0
+        self.fitted_on: Optional[str] = None  # Content hash of the file the steps were fitted on
+
+    def column_dtypes(self, path: str) -> Dict[str, type]:
+        """float64 for the numeric columns, str for everything else."""
+        if self.numeric_columns is not None:
+            header = pd.read_csv(path, nrows=0).columns
+            numeric = set(self.numeric_columns)
+        else:
+            sample = pd.read_csv(path, nrows=min(self.chunksize, 10_000))
+            header = sample.columns
+            numeric = {col for col in header if pd.api.types.is_numeric_dtype(sample[col])
+                       and not pd.api.types.is_bool_dtype(sample[col])}
+        return {col: np.float64 if col in numeric else str for col in header}
+
+    def read_chunks(self, path: str) -> Iterator[pd.DataFrame]:
+        # Fixed dtypes so every chunk parses and formats each column the same way
+        return pd.read_csv(path, header=0, dtype=self.column_dtypes(path), chunksize=self.chunksize)
+
+    # ----- stats pass -----
+
+    def fit(self, path: str) -> 'CleaningPipeline':
+        """
+        Scans the file until every step is fitted. Refitting on the same file
+        is a no-op; steps fitted on another file must be rebuilt first.
+        """
+        fingerprint = run_id_for(path)
+        if self.fitted_on == fingerprint:
+            return self
+        if self.fitted_on is not None or any(step.fitted for step in self.steps if step.needs_fit):
+            raise ValueError("The pipeline's steps are already fitted on another file; "
+                             "build a new pipeline (fresh steps) to fit on a different file.")
+        while not all(step.fitted for step in self.steps):
+            collecting = self._scan(path)
+            for step in collecting:
+                step.finish()
+        self.fitted_on = fingerprint
+        return self
+
+    def _scan(self, path: str) -> List[Step]:
+        """
+        One scan over the file. Fitted steps are applied; unfitted steps
+        collect statistics if nothing unfitted before them changes their
+        input, and otherwise wait for a later scan.
+        """
+        self.scans += 1
+        plan: List[Tuple[Step, bool, bool]] = []  # (step, collect, apply)
+        blocked: Set[str] = set()
+        rows_blocked = False
+        for step in self.steps:
+            clean = not rows_blocked and not _touches(step.reads, blocked)
+            collect = clean and not step.fitted
+            apply = clean and (step.fitted or step.online)
+            plan.append((step, collect, apply))
+            if not apply:
+                blocked |= set(step.writes)
+                rows_blocked |= step.filters_rows
+
+        collecting = [step for step, collect, _ in plan if collect]
+        for step in collecting:
+            position = self.steps.index(step)
+            step.begin(partial(self.new_quantiles, seed=self.seed + position))
+        for chunk in self.read_chunks(path):
+            for step, collect, apply in plan:
+                if collect and not step.online:
+                    step.collect(chunk)
+                if apply:
+                    chunk, _ = step.apply(chunk)
+                if chunk.empty:
+                    break
+        return collecting
+
+    # ----- transform pass -----
+
+    def transform_frame(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[pd.DataFrame]]:
+        """Applies every fitted step to a chunk of the fitted file (same row index)."""
+        return _apply_steps(self.steps, chunk)
+
+    def transform(self, path: str, output_path: str, on_flagged: Optional[FlagSink] = None) -> int:
+        """Streams `path` through the fitted steps into `output_path`; returns rows written."""
+        # Duplicate removal is by row position, so it is only valid on the fitted file
+        if self.fitted_on is None:
+            raise ValueError("The pipeline must be fitted before transform().")
+        if run_id_for(path) != self.fitted_on:
+            raise ValueError(f"'{path}' is not the file this pipeline was fitted on; "
+                             "fit a new pipeline on it instead.")
+        rows = 0
+        with open(output_path, "w", newline="") as out:
+            header_written = False
+            for columns, body, flagged in self._transformed_chunks(path):
+                if not header_written:
+                    out.write(pd.DataFrame(columns=columns).to_csv(index=False))
+                    header_written = True
+                out.write(body)
+                rows += body.count("\n")
+                if on_flagged is not None:
+                    for part in flagged:
+                        on_flagged(part)
+        return rows
+
+    def _transformed_chunks(self, path: str) -> Iterator[Tuple[List[str], str, List[pd.DataFrame]]]:
+        if self.workers <= 1:
+            _init_worker(self.steps)
+            yield from map(_transform_chunk, self.read_chunks(path))
+            return
+
+        # Keep only a few chunks in flight so memory stays bounded
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.steps,)) as executor:
+            pending: Deque[Future] = deque()
+            for chunk in self.read_chunks(path):
+                pending.append(executor.submit(_transform_chunk, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def run(self, path: str, output_path: str, on_flagged: Optional[FlagSink] = None) -> int:
+        """Stats pass followed by the transform pass."""
+        return self.fit(path).transform(path, output_path, on_flagged)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Clean the diabetes CSV in chunks.")
+    parser.add_argument("input", nargs="?", default="Akime-O_odham-diabetes.data.csv")
+    parser.add_argument("output", nargs="?", default="cleaned_data.csv")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--quantiles", choices=["exact", "sketch"], default="exact")
+    parser.add_argument("--sketch-k", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0, help="seed for the quantile sketches")
+    parser.add_argument("--numeric-columns", nargs="+",
+                        help="columns to read as numbers (default: inferred from the first rows)")
+    parser.add_argument("--log", default="cleaning_log.sqlite", help="sqlite error log")
+    parser.add_argument("--log-csv", help="also export this run's log in LOGfile.csv layout")
+    args = parser.parse_args()
+
+    pipeline = CleaningPipeline(chunksize=args.chunksize, workers=args.workers,
+                                quantile_mode=args.quantiles, sketch_k=args.sketch_k, seed=args.seed,
+                                numeric_columns=args.numeric_columns)
+    log = ErrorLog(args.log, run_id_for(args.input, args.quantiles, str(args.sketch_k), str(args.seed)))
+    with log:
+        rows = pipeline.run(args.input, args.output, on_flagged=log.add)
+    print(f"Cleaned data saved to '{args.output}' ({rows} rows, {pipeline.scans} stats scans).")
+    print(f"Flagged rows logged to '{args.log}' (run {log.run_id}):")
+    print(log.counts().to_string())
+    if args.log_csv:
+        log.export_csv(args.log_csv)
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
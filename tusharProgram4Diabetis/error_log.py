@@ -0,0 +1,179 @@
+"""
+Structured error log for the cleaning pipeline.
+
+The notebook appends rejected rows to LOGfile.csv with a separate
+`to_csv(mode='a')` per error type, so every re-run appends the same rows
+again. ErrorLog instead:
+
+- keeps one sqlite database with a row per flagged record
+  (run_id, ERROR_TYPE, Original_Line_Number, row values as a JSON object
+  keyed by column name, so rows flagged before and after a step that adds
+  a column can share one log; the run's column list grows to match),
+- writes a whole run inside one transaction that first deletes any earlier
+  rows for the same run_id, so re-running on the same input is idempotent,
+- derives the default run_id from the input file's content hash,
+- indexes error_type so rows of one type can be queried without scanning
+  the whole log.
+
+Usage:
+    with ErrorLog("cleaning_log.sqlite", run_id_for(path)) as log:
+        CleaningPipeline().run(path, "cleaned_data.csv", on_flagged=log.add)
+    log.query(error_type="Duplicate Row")
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    columns TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flagged_rows (
+    run_id TEXT NOT NULL,
+    error_type TEXT NOT NULL,
+    line_number INTEGER NOT NULL,
+    row_values TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS flagged_by_run_type ON flagged_rows (run_id, error_type, line_number);
+CREATE INDEX IF NOT EXISTS flagged_by_type ON flagged_rows (error_type);
+"""
+
+META_COLUMNS = ["ERROR_TYPE", "Original_Line_Number"]
+
+
+def run_id_for(path: str, *extra: str) -> str:
+    """Content hash of the input file (plus any extra labels), used as the run ID."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    for label in extra:
+        digest.update(label.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _json_value(value):
+    # NaN is not valid JSON; store it as null like an empty CSV cell
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+class ErrorLog:
+    """Buffered, run-keyed log of flagged rows backed by sqlite."""
+
+    def __init__(self, db_path: str = "cleaning_log.sqlite", run_id: Optional[str] = None,
+                 batch_rows: int = 10_000) -> None:
+        self.db_path = db_path
+        self.run_id = run_id
+        self.batch_rows = batch_rows
+        # Autocommit mode: transactions are opened and committed explicitly per run
+        self._conn = sqlite3.connect(db_path, isolation_level=None)
+        self._conn.executescript(SCHEMA)
+        self._buffer: List[tuple] = []
+        self._columns: Optional[List[str]] = None
+        self._open = False
+
+    # ----- writing -----
+
+    def __enter__(self) -> 'ErrorLog':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def add(self, flagged: pd.DataFrame) -> None:
+        """Buffers flagged rows (with ERROR_TYPE and Original_Line_Number columns)."""
+        if self.run_id is None:
+            raise ValueError("ErrorLog needs a run_id before rows can be added.")
+        if not self._open:
+            self._begin(flagged)
+        values = flagged.drop(columns=META_COLUMNS)
+        names = list(values.columns)
+        self._columns.extend(col for col in names if col not in self._columns)
+        for error_type, line, row in zip(flagged["ERROR_TYPE"], flagged["Original_Line_Number"],
+                                         values.itertuples(index=False, name=None)):
+            record = {name: _json_value(value) for name, value in zip(names, row)}
+            self._buffer.append((self.run_id, error_type, int(line), json.dumps(record)))
+        if len(self._buffer) >= self.batch_rows:
+            self._write_buffer()
+
+    def _begin(self, first: Optional[pd.DataFrame]) -> None:
+        """Opens the run's transaction and clears rows left by an earlier run with the same ID."""
+        columns = [] if first is None else list(first.columns)
+        self._columns = [col for col in columns if col not in META_COLUMNS]
+        self._conn.execute("BEGIN")
+        self._conn.execute("DELETE FROM flagged_rows WHERE run_id = ?", (self.run_id,))
+        self._conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                           (self.run_id, json.dumps(self._columns),
+                            datetime.now(timezone.utc).isoformat(timespec="seconds")))
+        self._open = True
+
+    def _write_buffer(self) -> None:
+        self._conn.executemany("INSERT INTO flagged_rows VALUES (?, ?, ?, ?)", self._buffer)
+        self._buffer = []
+
+    def commit(self) -> None:
+        """Writes the remaining buffer and commits the run as a whole."""
+        if not self._open and self.run_id is not None:
+            self._begin(None)  # A run with nothing flagged still replaces the previous one
+        if self._open:
+            self._write_buffer()
+            # Steps may add columns mid-run, so record the final column list
+            self._conn.execute("UPDATE runs SET columns = ? WHERE run_id = ?",
+                               (json.dumps(self._columns), self.run_id))
+            self._conn.execute("COMMIT")
+            self._open = False
+
+    def rollback(self) -> None:
+        """Discards the current run, leaving any earlier log for this run_id intact."""
+        self._buffer = []
+        if self._open:
+            self._conn.execute("ROLLBACK")
+            self._open = False
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ----- reading -----
+
+    def query(self, error_type: Optional[str] = None, run_id: Optional[str] = None) -> pd.DataFrame:
+        """Flagged rows of one run (default: this log's run), optionally of one error type."""
+        run_id = run_id or self.run_id
+        row = self._conn.execute("SELECT columns FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return pd.DataFrame(columns=META_COLUMNS)
+        columns = json.loads(row[0])
+
+        sql = "SELECT error_type, line_number, row_values FROM flagged_rows WHERE run_id = ?"
+        params: list = [run_id]
+        if error_type is not None:
+            sql += " AND error_type = ?"
+            params.append(error_type)
+        records = self._conn.execute(sql + " ORDER BY error_type, line_number", params).fetchall()
+
+        # Rows flagged before a column was added have no value for it (NaN)
+        frame = pd.DataFrame([json.loads(values) for _, _, values in records], columns=columns)
+        frame["ERROR_TYPE"] = [error for error, _, _ in records]
+        frame["Original_Line_Number"] = [line for _, line, _ in records]
+        return frame
+
+    def counts(self, run_id: Optional[str] = None) -> pd.Series:
+        """Number of flagged rows per error type for one run."""
+        records = self._conn.execute(
+            "SELECT error_type, COUNT(*) FROM flagged_rows WHERE run_id = ? GROUP BY error_type",
+            (run_id or self.run_id,)).fetchall()
+        return pd.Series(dict(records), name="count", dtype="int64")
+
+    def export_csv(self, path: str = "LOGfile.csv", run_id: Optional[str] = None) -> None:
+        """Writes one run in the notebook's LOGfile.csv layout (overwrites, never appends)."""
+        self.query(run_id=run_id).to_csv(path, index=False)
@@ -0,0 +1,154 @@
+"""
+Persisted preprocessing + model artifact and batch scoring for the diabetes model.
+
+At the end of WorkFlowDataPrep.ipynb the scaler and LogisticRegression are
+fitted on the fly and thrown away. `fit_artifact` runs the cleaning pipeline
+once, fits StandardScaler + LogisticRegression on the cleaned data, and
+saves a single artifact containing:
+
+- the fitted row-level cleaning steps (mean imputation values, zero/outlier
+  medians, the pedi/test log transforms, winsorization caps, rounding),
+- the raw input columns, the feature column order, the scaler and the model.
+
+The artifact is pickled as a plain dict of those parts, so it loads the
+same whether it was saved by `python scoring.py fit` or from library code.
+
+Row filters (duplicates, age/class range, IQR) only shape the training set
+and are left out: every new patient gets a score.
+
+`score_csv` streams a CSV of new records through the artifact in chunks,
+so large intake files are scored without repeating the cleaning pass. Only
+the model's input columns are read as numbers; any other columns (patient
+IDs, notes) are passed through to the output unchanged.
+
+Usage:
+    python scoring.py fit Akime-O_odham-diabetes.data.csv diabetes_model.pkl
+    python scoring.py score diabetes_model.pkl new_patients.csv scores.csv
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from cleaning_pipeline import CleaningPipeline, Step
+
+TARGET = 'class'
+
+
+class ScoringArtifact:
+    """Everything needed to turn raw patient rows into diabetes probabilities."""
+
+    def __init__(self, steps: List[Step], input_columns: List[str], feature_columns: List[str],
+                 scaler: StandardScaler, model: LogisticRegression) -> None:
+        self.steps = steps
+        self.input_columns = input_columns
+        self.feature_columns = feature_columns
+        self.scaler = scaler
+        self.model = model
+
+    def preprocess(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Applies the fitted cleaning transforms (no row filtering) to the input columns."""
+        chunk = chunk[self.input_columns].astype(np.float64)
+        for step in self.steps:
+            chunk, _ = step.apply(chunk)
+        return chunk
+
+    def predict_proba(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Probability of a positive diabetes test for each row of a raw chunk."""
+        X = self.preprocess(chunk)[self.feature_columns].to_numpy(dtype=np.float64)
+        return self.model.predict_proba(self.scaler.transform(X))[:, 1]
+
+    def save(self, path: str) -> None:
+        # A dict rather than the object itself, so the pickle does not record
+        # `__main__.ScoringArtifact` when saved from the command line
+        with open(path, "wb") as file:
+            pickle.dump(vars(self), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: str) -> 'ScoringArtifact':
+        with open(path, "rb") as file:
+            return ScoringArtifact(**pickle.load(file))
+
+
+def fit_artifact(input_csv: str, cleaned_csv: Optional[str] = None,
+                 pipeline: Optional[CleaningPipeline] = None) -> ScoringArtifact:
+    """
+    Cleans `input_csv`, then fits the scaler and logistic regression on all
+    cleaned rows (the notebook's model, without holding out a test split).
+    The cleaned data is kept in `cleaned_csv` if given, otherwise in a
+    temporary file.
+    """
+    pipeline = pipeline or CleaningPipeline()
+    with tempfile.TemporaryDirectory() as workdir:
+        cleaned_path = cleaned_csv or os.path.join(workdir, "cleaned.csv")
+        pipeline.run(input_csv, cleaned_path)
+        cleaned = pd.read_csv(cleaned_path)
+    # Train on the numeric input columns plus any the steps derived (e.g. test_log);
+    # text columns such as patient IDs are not features
+    dtypes = pipeline.column_dtypes(input_csv)
+    input_columns = [col for col, dtype in dtypes.items() if dtype is np.float64 and col != TARGET]
+    feature_columns = [col for col in cleaned.columns
+                       if col != TARGET and (col in input_columns or col not in dtypes)]
+    X = cleaned[feature_columns]
+    # Imputed class values are fractional; binarize as the notebook does
+    y = (cleaned[TARGET] >= 0.5).astype(int)
+
+    scaler = StandardScaler().fit(X.to_numpy())
+    model = LogisticRegression().fit(scaler.transform(X.to_numpy()), y)
+    value_steps = [step for step in pipeline.steps if not step.filters_rows]
+    return ScoringArtifact(value_steps, input_columns, feature_columns, scaler, model)
+
+
+def score_csv(artifact: ScoringArtifact, input_csv: str, output_csv: str,
+              chunksize: int = 100_000, threshold: float = 0.5) -> int:
+    """
+    Scores every row of `input_csv` and writes the original columns plus
+    `diabetes_probability` and `predicted_class`. Returns rows scored.
+    """
+    rows = 0
+    # Other columns are read as text so they are written back exactly as given
+    header = pd.read_csv(input_csv, nrows=0).columns
+    dtypes = {col: np.float64 if col in artifact.input_columns else str for col in header}
+    with open(output_csv, "w", newline="") as out:
+        for i, chunk in enumerate(pd.read_csv(input_csv, dtype=dtypes, chunksize=chunksize)):
+            probability = artifact.predict_proba(chunk)
+            scored = chunk.assign(diabetes_probability=probability,
+                                  predicted_class=(probability >= threshold).astype(int))
+            out.write(scored.to_csv(index=False, header=(i == 0)))
+            rows += len(scored)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit or apply the diabetes scoring artifact.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fit = commands.add_parser("fit", help="clean the training CSV and save a fitted artifact")
+    fit.add_argument("input", nargs="?", default="Akime-O_odham-diabetes.data.csv")
+    fit.add_argument("artifact", nargs="?", default="diabetes_model.pkl")
+    fit.add_argument("--cleaned", help="also keep the cleaned training data in this CSV")
+
+    score = commands.add_parser("score", help="score a CSV of new records in chunks")
+    score.add_argument("artifact")
+    score.add_argument("input")
+    score.add_argument("output")
+    score.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        fit_artifact(args.input, args.cleaned).save(args.artifact)
+        print(f"Fitted artifact saved to '{args.artifact}'.")
+    else:
+        rows = score_csv(ScoringArtifact.load(args.artifact), args.input, args.output, args.chunksize)
+        print(f"Scored {rows} rows into '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
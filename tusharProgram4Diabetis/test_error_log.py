@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from cleaning_pipeline import CleaningPipeline, ImputeMean, KeepRange, Log1p
+from error_log import ErrorLog
+
+
+def _flag_around_added_column(tmp_path):
+    data = pd.DataFrame({
+        'plas': [148.0, 85.0, np.nan, 89.0, 137.0],
+        'test': [0.0, 94.0, 168.0, 543.0, 846.0],
+        'class': [1.0, 0.0, 1.0, 2.0, 1.0],
+    })
+    path = tmp_path / "data.csv"
+    data.to_csv(path, index=False)
+    steps = [
+        ImputeMean(),                          # flags before test_log exists
+        Log1p('test', output='test_log'),
+        KeepRange('class', upper=1.0),         # flags after test_log exists
+        KeepRange('test_log', upper=6.5),
+    ]
+    log = ErrorLog(str(tmp_path / "log.sqlite"), run_id="run")
+    with log:
+        CleaningPipeline(steps=steps, chunksize=2).run(str(path), str(tmp_path / "clean.csv"),
+                                                       on_flagged=log.add)
+    return log
+
+
+def test_query_handles_rows_flagged_before_and_after_a_column_is_added(tmp_path):
+    log = _flag_around_added_column(tmp_path)
+    flagged = log.query()
+
+    assert list(flagged.columns) == ['plas', 'test', 'class', 'test_log',
+                                     'ERROR_TYPE', 'Original_Line_Number']
+    missing = flagged[flagged["ERROR_TYPE"] == "Missing Data"]
+    assert missing["Original_Line_Number"].tolist() == [4]
+    assert missing["test_log"].isna().all()
+    out_of_range = flagged[flagged["ERROR_TYPE"] == "Out of Range"].set_index("Original_Line_Number")
+    assert sorted(out_of_range.index) == [5, 6]
+    assert out_of_range.loc[5, "test_log"] == np.log1p(543.0)
+    assert log.counts().to_dict() == {"Missing Data": 1, "Out of Range": 2}
+
+
+def test_export_csv_includes_added_columns(tmp_path):
+    log = _flag_around_added_column(tmp_path)
+    log.export_csv(str(tmp_path / "LOGfile.csv"))
+
+    exported = pd.read_csv(tmp_path / "LOGfile.csv")
+    assert len(exported) == 3
+    assert "test_log" in exported.columns